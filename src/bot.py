@@ -1,5 +1,7 @@
 import os
 import json
+import hashlib
+import html
 import logging
 import smtplib
 import requests
@@ -8,10 +10,27 @@ import time
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from bs4 import BeautifulSoup
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import List, Optional
+from urllib.parse import urljoin, urlparse
+from typing import Dict, Iterator, List, Optional, Tuple, Union
 from playwright.sync_api import sync_playwright
 
+try:
+    import re2
+except ImportError:
+    re2 = None
+
+try:
+    from selectolax.lexbor import LexborHTMLParser as HTMLParser
+except ImportError:
+    HTMLParser = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # Load environment variables
 try:
     from dotenv import load_dotenv
@@ -27,8 +46,158 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 # Constants
-HISTORY_FILE = 'data/job_history.json'
+HISTORY_FILE = 'data/job_history.log'
+LEGACY_HISTORY_FILE = 'data/job_history.json'
+DESC_CACHE_FILE = 'data/desc_cache.json'
+VERDICT_CACHE_FILE = 'data/gemini_cache.json'
+HISTORY_TTL_DAYS = 90
+ANALYSIS_BATCH_SIZE = 20
+DESCRIPTION_WINDOW = 1500
+# The task is a simple yes/no classification, so the lite model is enough
+GEMINI_MODEL = os.getenv('GEMINI_MODEL', 'gemini-2.5-flash-lite')
+
+# Section headers that mark where the substance of a job description starts
+DESCRIPTION_HEADERS = [
+    'Role Overview', 'About the Role', 'Job Description', 'Responsibilities',
+    'Requirements', 'Qualifications', "What You'll Do",
+]
+# One pass finds the earliest header, whichever one it is
+_HEADER_RE = re.compile('|'.join(map(re.escape, DESCRIPTION_HEADERS)))
+_WHITESPACE_RE = re.compile(r'\s+')
+
+MATCH_CRITERIA = """
+    CRITERIA:
+    1. Role Type: Must be a Generalist OR General Annotation/Data Labeling role.
+       - It should be suitable for a recent graduate or undergraduate.
+       - It MUST NOT require specialized advanced degrees (like MD, PhD, JD) unless acceptable for a fresh grad.
+       - It MUST NOT require 5+ years of specialized experience.
+    2. Language: Must be English or Swahili only. No other foreign languages.
+    3. Location: Remote, US-based, or Worldwide.
+"""
+# Static instructions go in the system instruction; only the job text varies per call
+JOB_SYSTEM_PROMPT = f"""
+    Analyze the following job description to see if it matches these strict criteria:
+    {MATCH_CRITERIA}
+    Give a match verdict and a short explanation as the reason.
+"""
+BATCH_SYSTEM_PROMPT = f"""
+    You will receive a JSON array of jobs, each with "id", "title" and "description".
+    Analyze each job independently to see if it matches these strict criteria:
+    {MATCH_CRITERIA}
+    Return one verdict per job, in the same order, with the job's id and a short explanation as the reason.
+"""
+# Structured output schemas, so the reply is always bare, well-formed JSON
+MATCH_SCHEMA = {
+    'type': 'OBJECT',
+    'properties': {'match': {'type': 'BOOLEAN'}, 'reason': {'type': 'STRING'}},
+    'required': ['match', 'reason'],
+}
+BATCH_MATCH_SCHEMA = {
+    'type': 'ARRAY',
+    'items': {
+        'type': 'OBJECT',
+        'properties': {'id': {'type': 'STRING'}, **MATCH_SCHEMA['properties']},
+        'required': ['id', *MATCH_SCHEMA['required']],
+    },
+}
 MERCOR_URL = 'https://mercor.com'
+EXPLORE_URL = 'https://work.mercor.com/explore'
+MAX_PAGES = 5
+DETAIL_WORKERS = 10
+ANALYSIS_WORKERS = 4
+BROWSER_TABS = 5
+# Browser requests the scraper never needs: heavy assets, analytics and ad pixels
+BLOCKED_RESOURCE_TYPES = {'image', 'font', 'media', 'stylesheet'}
+BLOCKED_HOSTS = (
+    'googletagmanager.com', 'google-analytics.com', 'segment.io', 'segment.com',
+    'sentry.io', 'bat.bing.com', 'redditstatic.com', 'ads-twitter.com', 'vector.co',
+)
+# Next.js build assets are content-hashed, so a cached copy never goes stale
+STATIC_ASSET_GLOB = '**/_next/static/**'
+STATIC_CACHE_DIR = '.cache_static'
+# Dev/CI-retry aid: MERCOR_HAR=record saves browser traffic here, MERCOR_HAR=replay serves it back
+HAR_PATH = 'data/mercor.har'
+# No display in headless runs, so skip GPU compositing and /dev/shm (small in containers)
+CHROMIUM_ARGS = [
+    '--disable-gpu', '--no-sandbox', '--disable-dev-shm-usage',
+    '--disable-blink-features=AutomationControlled',
+]
+HTTP_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+# Matches both explore links (?listingId=list_...) and job links (/jobs/list_.../slug)
+_LISTING_RE = re.compile(r'(?:listingId=|jobs/)(list_[\w-]+)')
+_NEXT_DATA_RE = re.compile(r'<script id="__NEXT_DATA__"[^>]*>(.*?)</script>', re.DOTALL)
+_JSONLD_RE = re.compile(
+    r'<script[^>]*type=["\']application/ld\+json["\'][^>]*>(.*?)</script>', re.DOTALL
+)
+
+# Title keywords that rule a job out before any detail fetch or Gemini call
+EXCLUDED_KEYWORDS = [
+    'senior', 'sr', 'lead', 'principal', 'manager', 'director', 'vp',
+    'architect', 'phd', 'md', 'jd', 'expert', 'advanced', 'experienced',
+    'iii', 'iv', 'head of',
+]
+# Title keywords that always go through to analysis, even if excluded above.
+# Matched as word prefixes, so plurals ("Generalists", "Annotators") count too.
+ALLOWED_EXCEPTIONS = [
+    'generalist', 'annotation', 'annotator', 'data labeling', 'data labelling',
+]
+
+# Requirements that rule a job out without a Gemini call: 5+ years of
+# experience and native fluency in a language other than English/Swahili.
+# Only requirement phrasing counts ("5+ years of experience", "native Korean
+# speaker"), and see _SOFTENER_RE for wording that cancels a match.
+_YEARS_PATTERN = r'\b(?:[5-9]|[1-9]\d)\+\s*(?:years|yrs)'
+_NATIVE_PATTERN = (
+    r'\bnative(?:[\s-]level)?\s+(?!english\b|swahili\b)[a-z]+\s+(?:speaker|fluency|proficiency)\b'
+)
+DISQUALIFY_RE = re.compile(
+    _YEARS_PATTERN + r'(?:\s+of)?(?:\s+[\w-]+){0,3}?\s+experience\b|' + _NATIVE_PATTERN,
+    re.IGNORECASE,
+)
+# In a title any number of years is the requirement itself ("Reviewer (10+ years)")
+TITLE_DISQUALIFY_RE = re.compile(_YEARS_PATTERN + r'\b|' + _NATIVE_PATTERN, re.IGNORECASE)
+# A match is ignored if its sentence, or the text just before it (e.g. a
+# "Preferred qualifications" heading), says it is not a hard requirement
+_SOFTENER_RE = re.compile(
+    r'\b(?:preferred|a\s+plus|nice\s+to\s+have|bonus|optional|not\s+required)\b', re.IGNORECASE
+)
+_SENTENCE_END_RE = re.compile(r'[.;\n<]')  # '<' ends a list item in HTML descriptions
+SOFTENER_LOOKBEHIND = 150
+
+def _keyword_pattern(keyword: str) -> str:
+    return r'\b' + re.escape(keyword).replace(r'\ ', r'\s+') + r'\w*'
+
+def _build_keyword_set(keywords: List[str]):
+    """Compile keywords into a google-re2 Set (one DFA pass per title)."""
+    options = re2.Options()
+    options.case_sensitive = False
+    keyword_set = re2.Set.SearchSet(options)
+    for keyword in keywords:
+        keyword_set.Add(_keyword_pattern(keyword))
+    keyword_set.Compile()
+    return keyword_set
+
+# Compiled once so each title is a single scan
+_ALLOW_RE = re.compile('|'.join(map(_keyword_pattern, ALLOWED_EXCEPTIONS)), re.IGNORECASE)
+_ALLOW_SET = _build_keyword_set(ALLOWED_EXCEPTIONS) if re2 else None
+
+# Exclusions are checked by token: single words by set intersection, and
+# multi-word phrases against the space-joined tokens
+_WORD_RE = re.compile(r'\w+')
+_EXCLUDED_WORDS = frozenset(k for k in EXCLUDED_KEYWORDS if ' ' not in k)
+_EXCLUDED_PHRASES = tuple(k for k in EXCLUDED_KEYWORDS if ' ' in k)
+
+def json_loads(data: Union[str, bytes]):
+    """Parse JSON, using orjson when it is installed."""
+    return orjson.loads(data) if orjson else json.loads(data)
+
+def json_dumps(obj) -> bytes:
+    """Serialize compact JSON to UTF-8 bytes, using orjson when it is installed."""
+    if orjson:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(',', ':'), ensure_ascii=False).encode()
 
 @dataclass
 class Job:
@@ -37,72 +206,748 @@ class Job:
     url: str
     description: str = ""
 
-def load_history() -> List[str]:
-    """Load the list of previously seen job IDs."""
-    if not os.path.exists(HISTORY_FILE):
+def job_url(job_id: str) -> str:
+    """Build the public page URL for a listing ID."""
+    return urljoin(EXPLORE_URL, f"/jobs/{job_id}")
+
+def _find_keyword(title: str, keywords: List[str], keyword_set, keyword_re) -> Optional[str]:
+    """Return the first keyword found in the title, or None."""
+    if keyword_set is not None:
+        hits = keyword_set.Match(title)
+        return keywords[min(hits)] if hits else None
+    match = keyword_re.search(title)
+    return match.group(0) if match else None
+
+def is_excluded_title(title: str) -> bool:
+    """Check whether a job title disqualifies the job outright.
+
+    Titles that spell out a TITLE_DISQUALIFY_RE requirement are excluded even
+    when they name an allowed role, so such jobs never get a detail fetch.
+    """
+    match = TITLE_DISQUALIFY_RE.search(title)
+    if match:
+        logger.info(f"Excluded by title ('{match.group(0)}'): {title}")
+        return True
+    if _find_keyword(title, ALLOWED_EXCEPTIONS, _ALLOW_SET, _ALLOW_RE):
+        return False
+    words = _WORD_RE.findall(title.lower())
+    hits = _EXCLUDED_WORDS.intersection(words)
+    if not hits:
+        joined = f" {' '.join(words)} "
+        hits = {phrase for phrase in _EXCLUDED_PHRASES if f" {phrase} " in joined}
+    if hits:
+        logger.info(f"Excluded by title ('{min(hits)}'): {title}")
+        return True
+    return False
+
+def find_disqualifying_requirement(text: str) -> Optional[str]:
+    """Return the first DISQUALIFY_RE requirement in text that is not softened, or None."""
+    for match in DISQUALIFY_RE.finditer(text):
+        end = _SENTENCE_END_RE.search(text, match.end())
+        context = text[max(0, match.start() - SOFTENER_LOOKBEHIND):end.start() if end else len(text)]
+        if not _SOFTENER_RE.search(context):
+            return match.group(0)
+    return None
+
+def is_disqualified(job: Job) -> bool:
+    """Check whether the job's description rules it out without asking Gemini."""
+    requirement = find_disqualifying_requirement(job.description)
+    if requirement:
+        logger.info(f"Disqualified by description ('{requirement}'): {job.title}")
+        return True
+    return False
+
+def extract_jsonld_description(content: str) -> str:
+    """Pull the JobPosting description out of a page's JSON-LD blocks."""
+    for match in _JSONLD_RE.finditer(content):
+        try:
+            data = json_loads(match.group(1))
+        except json.JSONDecodeError:
+            continue
+        if isinstance(data, dict) and data.get('@type') == 'JobPosting':
+            return data.get('description') or ""
+    return ""
+
+# Only anchors that can carry a listing ID; the parser filters these natively
+_JOB_LINK_SELECTOR = 'a[href*="list_"]'
+# role_description() on the embedded __NEXT_DATA__ script, which is there before
+# (and whether or not) the client bundle runs and sets window.__NEXT_DATA__;
+# only the description string comes back over the wire
+_NEXT_DATA_DESCRIPTION_JS = (
+    "() => JSON.parse(document.getElementById('__NEXT_DATA__')?.textContent || '{}')"
+    ".props?.pageProps?.role?.description || ''"
+)
+# Next.js emits this at the end of <body>, so once it is attached the whole
+# server-rendered document (head JSON-LD, <main>) has been parsed
+_JOB_DETAIL_SELECTOR = '#__NEXT_DATA__'
+
+def iter_job_links(content: str) -> Iterator[Tuple[str, str]]:
+    """Yield (href, text) for every anchor in the page that links to a listing."""
+    if HTMLParser is not None:
+        for node in HTMLParser(content).css(_JOB_LINK_SELECTOR):
+            yield node.attributes.get('href') or '', node.text(strip=True)
+        return
+    soup = BeautifulSoup(content, 'lxml')
+    for link in soup.select(_JOB_LINK_SELECTOR):
+        yield link['href'], link.get_text(strip=True)
+
+def page_text(content: str) -> str:
+    """Return the visible text of a page's <main> (or body), without scripts or styles."""
+    if HTMLParser is not None:
+        tree = HTMLParser(content)
+        tree.strip_tags(['script', 'style', 'noscript'])
+        root = tree.css_first('main') or tree.body or tree.root
+        return root.text(separator=' ', strip=True) if root else ""
+    soup = BeautifulSoup(content, 'lxml')
+    for tag in soup(['script', 'style', 'noscript']):
+        tag.decompose()
+    root = soup.select_one('main') or soup
+    return root.get_text(separator=' ', strip=True)
+
+def extract_next_data(content: str) -> Optional[dict]:
+    """Parse the __NEXT_DATA__ payload embedded in a Next.js page."""
+    match = _NEXT_DATA_RE.search(content)
+    if not match:
+        return None
+    try:
+        return json_loads(match.group(1))
+    except json.JSONDecodeError:
+        return None
+
+def role_description(data: dict) -> str:
+    """Return the listing description from a job page's Next.js data, or ""."""
+    return (data.get('pageProps', {}).get('role') or {}).get('description') or ""
+
+def iter_listings(data) -> Iterator[dict]:
+    """Walk Next.js page data and yield every object that looks like a job listing.
+
+    Listings sit somewhere under pageProps.dehydratedState (React Query), but
+    the exact path is not a stable API, so match on shape instead.
+    """
+    stack = [data]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            listing_id = node.get('listingId')
+            if isinstance(listing_id, str) and listing_id.startswith('list_') and node.get('title'):
+                yield node
+                continue
+            stack.extend(reversed(list(node.values())))
+        elif isinstance(node, list):
+            stack.extend(reversed(node))
+
+def block_heavy_requests(route):
+    """Playwright route handler that aborts blocked resource types and tracker hosts."""
+    request = route.request
+    host = urlparse(request.url).hostname or ''
+    if request.resource_type in BLOCKED_RESOURCE_TYPES or host.endswith(BLOCKED_HOSTS):
+        route.abort()
+    else:
+        route.fallback()
+
+def cache_static_route(route):
+    """Playwright route handler that serves build assets from an on-disk cache.
+
+    Playwright's own HTTP cache is off once routes are registered and does not
+    outlive the context, so without this every run re-downloads the JS bundles.
+    """
+    url = route.request.url
+    extension = os.path.splitext(urlparse(url).path)[1]
+    path = os.path.join(STATIC_CACHE_DIR, hashlib.md5(url.encode()).hexdigest() + extension)
+    if os.path.exists(path):
+        # The extension lets Playwright infer the content type
+        route.fulfill(path=path)
+        return
+    try:
+        response = route.fetch()
+    except Exception as e:
+        logger.warning(f"Static asset fetch failed, passing it on: {e}")
+        route.fallback()
+        return
+    if response.ok:
+        # Assets are never revalidated, so a torn write must never reach the cache
+        os.makedirs(STATIC_CACHE_DIR, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(response.body())
+        os.replace(tmp_path, path)
+    route.fulfill(response=response)
+
+def launch_browser(playwright):
+    """Launch Chromium headless, or with a window when MERCOR_DEBUG=1."""
+    headless = os.getenv('MERCOR_DEBUG') != '1'
+    logger.info(f"Launching browser (Headless: {headless})...")
+    return playwright.chromium.launch(headless=headless, args=CHROMIUM_ARGS)
+
+def fetch_explore_data(session: requests.Session) -> dict:
+    """Fetch the explore page's __NEXT_DATA__ (first page of listings plus the buildId)."""
+    response = session.get(EXPLORE_URL, timeout=30)
+    response.raise_for_status()
+    data = extract_next_data(response.text)
+    if not data or 'buildId' not in data:
+        raise ValueError("No __NEXT_DATA__ found on explore page")
+    return data
+
+def fetch_listing_pages(session: requests.Session, explore_data: dict) -> Iterator[List[Tuple[str, str]]]:
+    """Yield (job_id, title) pairs per explore page, read from Next.js data over HTTP.
+
+    The first page comes from the explore page's __NEXT_DATA__; later pages
+    come from the JSON data route for the same buildId.
+    """
+    data_url = urljoin(EXPLORE_URL, f"/_next/data/{explore_data['buildId']}/explore.json")
+
+    seen = set()
+    page_props = explore_data.get('props', {}).get('pageProps', {})
+    for page_number in range(1, MAX_PAGES + 1):
+        if page_number > 1:
+            response = session.get(data_url, params={'page': page_number}, timeout=30)
+            response.raise_for_status()
+            page_props = json_loads(response.content).get('pageProps', {})
+        # The dehydrated state can hold a listing under several queries; keep the first
+        listings: Dict[str, str] = {}
+        for listing in iter_listings(page_props):
+            listings.setdefault(listing['listingId'], listing['title'])
+        # Stop once a page brings nothing new (past the end, or page ignored)
+        if seen.issuperset(listings):
+            return
+        seen.update(listings)
+        yield list(listings.items())
+
+class Scraper:
+    """One Playwright browser and context shared by every browser fallback.
+
+    Chromium is only launched on the first new_page() call, so a run served
+    entirely over HTTP never starts a browser.
+    """
+
+    def __init__(self):
+        self._playwright = None
+        self.browser = None
+        self.context = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _start(self):
+        try:
+            self._launch()
+        except Exception:
+            # Don't leave Playwright half started; the next new_page() starts over
+            self.close()
+            raise
+
+    def _launch(self):
+        self._playwright = sync_playwright().start()
+        self.browser = launch_browser(self._playwright)
+        har_mode = os.getenv('MERCOR_HAR', '').lower()
+        context_options = {'viewport': {'width': 1366, 'height': 768}}
+        if har_mode == 'record':
+            logger.info(f"Recording browser traffic to {HAR_PATH}")
+            context_options.update(record_har_path=HAR_PATH, record_har_mode='minimal')
+        self.context = self.browser.new_context(**context_options)
+        # Routes run last-registered first: HAR replay, blocking, then the asset cache
+        self.context.route(STATIC_ASSET_GLOB, cache_static_route)
+        self.context.route("**/*", block_heavy_requests)
+        if har_mode == 'replay' and os.path.exists(HAR_PATH):
+            logger.info(f"Replaying browser traffic from {HAR_PATH}")
+            self.context.route_from_har(HAR_PATH, not_found='fallback')
+
+    def new_page(self):
+        """Open a tab on the shared context, launching the browser if needed."""
+        if self.context is None:
+            self._start()
+        return self.context.new_page()
+
+    def close(self):
+        # Closing the context is what writes a recorded HAR
+        try:
+            if self.context is not None:
+                self.context.close()
+            if self.browser is not None:
+                self.browser.close()
+        finally:
+            if self._playwright is not None:
+                self._playwright.stop()
+            self._playwright = self.browser = self.context = None
+
+def browse_listing_pages(scraper: Scraper) -> Iterator[List[Tuple[str, str]]]:
+    """Yield (job_id, title) pairs per explore page by clicking through it in the browser."""
+    page = scraper.new_page()
+    try:
+        logger.info(f"Navigating to {MERCOR_URL}...")
+        try:
+            page.goto(EXPLORE_URL, timeout=60000, wait_until='domcontentloaded')
+        except:
+            pass # The listing selector wait below decides whether the page is usable
+        
+        # Check for redirect
+        if "/login" in page.url or "auth-wall" in page.url:
+            logger.error("Redirected to login. Cannot scrape.")
+            return
+
+        # Wait for job listings
+        logger.info("Scanning for jobs...")
+        try:
+            page.wait_for_selector(_JOB_LINK_SELECTOR, state='attached', timeout=30000)
+        except Exception as e:
+            logger.warning(f"Timeout waiting for first job selector: {e}")
+
+        current_page = 1
+        while current_page <= MAX_PAGES:
+            # A card can link to its job more than once; keep the first link's title
+            listings: Dict[str, str] = {}
+            for href, link_text in iter_job_links(page.content()):
+                match = _LISTING_RE.search(href)
+                if match and match.group(1) not in listings:
+                    # Clean title
+                    title = link_text
+                    if "Apply" in title:
+                        title = title.split("Apply")[0].strip()
+                    listings[match.group(1)] = title
+            yield list(listings.items())
+            
+            # Check for Next button
+            try:
+                next_btn = page.locator('button[title="Next"]')
+                if next_btn.is_visible() and next_btn.is_enabled():
+                    first_href = page.get_attribute(_JOB_LINK_SELECTOR, 'href')
+                    next_btn.click()
+                    # The next page has rendered once the first listing changes
+                    page.wait_for_function(
+                        "([selector, prev]) => document.querySelector(selector)?.getAttribute('href') !== prev",
+                        arg=[_JOB_LINK_SELECTOR, first_href],
+                        timeout=15000,
+                    )
+                    current_page += 1
+                else:
+                    break
+            except:
+                break
+    finally:
+        page.close()
+
+def get_jobs_details(scraper: Scraper, jobs: List[Job]) -> List[Job]:
+    """Render job pages on a pool of BROWSER_TABS tabs and fill in their descriptions.
+
+    The sync API blocks on every call, so each round starts a navigation on
+    every tab (returning as soon as it commits) and only then waits on each
+    tab in turn; the browser loads the whole round concurrently. Returns the
+    jobs whose page could be read.
+    """
+    if not jobs:
         return []
+    pages = [scraper.new_page() for _ in range(min(BROWSER_TABS, len(jobs)))]
+    loaded = []
+    try:
+        for start in range(0, len(jobs), len(pages)):
+            round_jobs = list(zip(pages, jobs[start:start + len(pages)]))
+            started = []
+            for page, job in round_jobs:
+                try:
+                    page.goto(job.url, timeout=30000, wait_until='commit')
+                    started.append((page, job))
+                except Exception as e:
+                    logger.error(f"Failed to process {job.id}: {e}")
+            for page, job in started:
+                logger.info(f"Rendering in browser: {job.url}")
+                try:
+                    # Wait for the document to be parsed, not for the page to go quiet
+                    try:
+                        page.wait_for_selector(_JOB_DETAIL_SELECTOR, state='attached', timeout=10000)
+                    except Exception:
+                        # No Next.js data; never read a body that is still streaming
+                        page.wait_for_load_state('domcontentloaded', timeout=10000)
+                    
+                    # Same order as over HTTP: Next.js data, then the JSON-LD in
+                    # <head>; the whole document is only pulled if both are missing
+                    job.description = page.evaluate(_NEXT_DATA_DESCRIPTION_JS)
+                    if not job.description:
+                        head_html = page.evaluate("() => document.head.innerHTML")
+                        job.description = extract_jsonld_description(head_html)
+                    if not job.description:
+                        job.description = page_text(page.content())
+                    loaded.append(job)
+                except Exception as e:
+                    logger.error(f"Failed to process {job.id}: {e}")
+    finally:
+        for page in pages:
+            page.close()
+    return loaded
+
+def get_job_details(scraper: Scraper, job: Job) -> Job:
+    """Render a single job page in the browser and fill in its description."""
+    get_jobs_details(scraper, [job])
+    return job
+
+def fetch_latest_jobs(scraper: Scraper, session: requests.Session,
+                      explore_data: Optional[dict] = None) -> Iterator[List[Tuple[str, str]]]:
+    """Yield (job_id, title) pairs per explore page, preferring the Next.js data API.
+
+    Falls back to browsing with Playwright if the API yields nothing.
+    """
+    found_any = False
+    try:
+        for listings in fetch_listing_pages(session, explore_data or fetch_explore_data(session)):
+            found_any = found_any or bool(listings)
+            yield listings
+    except Exception as e:
+        logger.warning(f"Next.js data discovery failed: {e}")
+    if found_any:
+        return
+    logger.info("Falling back to browser discovery")
+    yield from browse_listing_pages(scraper)
+
+def make_session() -> requests.Session:
+    """Create a keep-alive HTTP session with a connection pool sized for its users.
+
+    DETAIL_WORKERS fetch job details while the main thread pages through
+    discovery on the same session, so the pool holds one extra connection.
+    """
+    session = requests.Session()
+    session.headers.update(HTTP_HEADERS)
+    adapter = requests.adapters.HTTPAdapter(pool_maxsize=DETAIL_WORKERS + 1)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+def fetch_job_description(session: requests.Session, job: Job, cached: Optional[dict] = None,
+                          build_id: Optional[str] = None) -> dict:
+    """Fetch a job over plain HTTP and return its description cache entry.
+
+    With a build_id the listing is read from the Next.js data route, which is
+    plain JSON; otherwise, or if that has no description, from the job page's
+    JSON-LD or its embedded __NEXT_DATA__. If the cached entry has an ETag the request is conditional,
+    and a 304 returns the cached entry without re-parsing anything.
+    """
+    headers = {}
+    if cached and cached.get('etag'):
+        headers['If-None-Match'] = cached['etag']
+    if build_id:
+        response = session.get(
+            urljoin(EXPLORE_URL, f"/_next/data/{build_id}/jobs/{job.id}.json"), headers=headers, timeout=15
+        )
+        if response.status_code == 304 and cached:
+            return cached
+        if response.ok:
+            try:
+                description = role_description(json_loads(response.content))
+            except ValueError:
+                description = ""
+            if description:
+                return {'etag': response.headers.get('ETag'), 'description': description}
+
+    response = session.get(job.url, headers=headers, timeout=15)
+    if response.status_code == 304 and cached:
+        return cached
+    response.raise_for_status()
+    description = extract_jsonld_description(response.text)
+    if not description:
+        # The page embeds the same data the data route serves
+        description = role_description((extract_next_data(response.text) or {}).get('props', {}))
+    return {'etag': response.headers.get('ETag'), 'description': description}
+
+def fetch_description_entry(session: requests.Session, job: Job, desc_cache: Dict[str, dict],
+                            build_id: Optional[str] = None) -> Optional[dict]:
+    """Get a job's description cache entry, from the cache or over HTTP.
+
+    Runs on a worker thread, so it only reads desc_cache; apply_description
+    stores the result from the main thread.
+    """
+    cached = desc_cache.get(job.id)
+    if cached and not cached.get('etag'):
+        return cached
     try:
-        with open(HISTORY_FILE, 'r') as f:
-            return json.load(f)
+        return fetch_job_description(session, job, cached, build_id)
+    except Exception as e:
+        logger.warning(f"HTTP fetch failed for {job.id}: {e}")
+        return cached
+
+def apply_description(job: Job, entry: Optional[dict], desc_cache: Dict[str, dict]):
+    """Copy a fetched description onto the job and into the cache; empty ones are skipped.
+
+    The entry's TTL restarts, since the job is still listed.
+    """
+    if entry and entry['description']:
+        entry['seen'] = round(time.time())
+        desc_cache[job.id] = entry
+        job.description = entry['description']
+
+def save_desc_cache(desc_cache: Dict[str, dict], processed_ids: List[str]):
+    """Save descriptions for jobs that are not processed yet.
+
+    Processed jobs go into history and are never fetched again, so only the
+    rest are worth keeping for the next run to revalidate. Entries for jobs
+    that are delisted first age out through load_timed_cache.
+    """
+    processed = set(processed_ids)
+    save_json_cache(DESC_CACHE_FILE, {k: v for k, v in desc_cache.items() if k not in processed})
+
+def load_legacy_history() -> Dict[str, float]:
+    """Load history from the old JSON file (a list of IDs, or ID -> last seen)."""
+    try:
+        with open(LEGACY_HISTORY_FILE, 'rb') as f:
+            history = json_loads(f.read())
     except (json.JSONDecodeError, IOError) as e:
+        logger.error(f"Error loading legacy history: {e}")
+        return {}
+    if isinstance(history, list):
+        now = time.time()
+        history = {job_id: now for job_id in history}
+    # Older runs stored some IDs without their list_ prefix; normalize them so
+    # those jobs are still recognized as seen
+    return {
+        job_id if job_id.startswith('list_') else f"list_{job_id}": seen
+        for job_id, seen in history.items()
+    }
+
+def load_history() -> Dict[str, float]:
+    """Replay the history log into job ID -> last seen time.
+
+    The log is append-only, so a job can appear on several lines; the last
+    one wins. Entries older than HISTORY_TTL_DAYS are dropped, and the log is
+    compacted once it holds more than twice as many lines as live jobs.
+    """
+    if not os.path.exists(HISTORY_FILE):
+        if not os.path.exists(LEGACY_HISTORY_FILE):
+            return {}
+        logger.info(f"Migrating {LEGACY_HISTORY_FILE} to {HISTORY_FILE}")
+        history = load_legacy_history()
+        save_history(history)
+        return history
+
+    try:
+        with open(HISTORY_FILE, 'rb') as f:
+            lines = f.read().decode().splitlines()
+    except IOError as e:
         logger.error(f"Error loading history: {e}")
-        return []
+        return {}
+
+    history = {}
+    line_count = 0
+    now = time.time()
+    for line in lines:
+        job_id, _, seen = line.strip().partition(' ')
+        if not job_id:
+            continue
+        line_count += 1
+        try:
+            history[job_id] = float(seen)
+        except ValueError:
+            history[job_id] = now
+
+    cutoff = now - HISTORY_TTL_DAYS * 86400
+    history = {job_id: seen for job_id, seen in history.items() if seen >= cutoff}
+    if line_count > 2 * len(history):
+        save_history(history)
+    return history
 
-def save_history(history: List[str]):
-    """Save the updated list of job IDs."""
+def append_history(entries: Dict[str, float]):
+    """Append job sightings to the history log; O(new entries), not O(history)."""
+    if not entries:
+        return
     os.makedirs(os.path.dirname(HISTORY_FILE), exist_ok=True)
-    with open(HISTORY_FILE, 'w') as f:
-        json.dump(history, f, indent=2)
+    with open(HISTORY_FILE, 'a') as f:
+        f.write(''.join(f"{job_id} {seen:.0f}\n" for job_id, seen in entries.items()))
+
+def save_history(history: Dict[str, float]):
+    """Compact the history log to one line per job, pruning stale entries.
+
+    Lines are sorted by job ID so the committed log diffs cleanly between runs.
+    """
+    cutoff = time.time() - HISTORY_TTL_DAYS * 86400
+    os.makedirs(os.path.dirname(HISTORY_FILE), exist_ok=True)
+    tmp_path = f"{HISTORY_FILE}.tmp"
+    with open(tmp_path, 'w') as f:
+        f.write(''.join(
+            f"{job_id} {seen:.0f}\n" for job_id, seen in sorted(history.items()) if seen >= cutoff
+        ))
+    os.replace(tmp_path, HISTORY_FILE)
+
+def load_json_cache(path: str) -> Dict[str, dict]:
+    """Load a JSON cache file, returning an empty cache if it is missing or corrupt."""
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'rb') as f:
+            return json_loads(f.read())
+    except (json.JSONDecodeError, IOError) as e:
+        logger.error(f"Error loading cache {path}: {e}")
+        return {}
+
+def load_timed_cache(path: str) -> Dict[str, dict]:
+    """Load a cache whose entries carry a 'seen' time, dropping ones unused for HISTORY_TTL_DAYS.
+
+    Entries from before the cache was timestamped start their TTL now.
+    """
+    now = time.time()
+    cutoff = now - HISTORY_TTL_DAYS * 86400
+    cache = load_json_cache(path)
+    for entry in cache.values():
+        entry.setdefault('seen', round(now))
+    return {key: entry for key, entry in cache.items() if entry['seen'] >= cutoff}
+
+def save_json_cache(path: str, cache: Dict[str, dict]):
+    """Atomically write a JSON cache file so a crash never leaves it truncated."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(json_dumps(cache))
+    os.replace(tmp_path, path)
+
+def verdict_key(job: Job) -> str:
+    """Hash the text Gemini sees, so reposted or unchanged jobs share a verdict."""
+    return hashlib.sha1(f"{job.title}\n{job.description}".encode()).hexdigest()
+
+def optimize_description(text: str) -> str:
+    """Cut a description down to DESCRIPTION_WINDOW chars from its first section header.
+
+    This skips page chrome (navigation, pay badges) that precedes the
+    description in rendered page text and keeps the Gemini prompt small.
+    Runs of whitespace are collapsed first so the window holds only content.
+    """
+    text = _WHITESPACE_RE.sub(' ', text).strip()
+    n = len(text)
+    if n <= DESCRIPTION_WINDOW:
+        # Already fits; skip the header scan and the copy
+        return text
+    match = _HEADER_RE.search(text)
+    start_safe = max(0, match.start() - 20) if match else 0
+    end = min(n, start_safe + DESCRIPTION_WINDOW)
+    return text[start_safe:end] + ("\n...[TRUNCATED]..." if end < n else "")
+
+def cached_verdict(job: Job, verdict_cache: Optional[Dict[str, dict]]) -> Optional[bool]:
+    """Return the memoized verdict for this job's text, if there is one."""
+    if verdict_cache is None:
+        return None
+    cached = verdict_cache.get(verdict_key(job))
+    if cached is None:
+        return None
+    # A reused verdict is still live, so restart its TTL
+    cached['seen'] = round(time.time())
+    logger.info(f"Cached verdict ({'match' if cached['match'] else 'no match'}): {job.title}")
+    return cached['match']
+
+def record_verdict(job: Job, result: dict, verdict_cache: Optional[Dict[str, dict]]) -> bool:
+    """Log a Gemini verdict and memoize it in verdict_cache."""
+    match = bool(result.get('match'))
+    if verdict_cache is not None:
+        verdict_cache[verdict_key(job)] = {
+            'match': match, 'reason': result.get('reason', ''), 'seen': round(time.time()),
+        }
+    if match:
+        logger.info(f"MATCH found: {job.title} - {result.get('reason')}")
+    else:
+        logger.info(f"No match: {job.title} - {result.get('reason')}")
+    return match
+
+_genai_client = None
+
+def get_genai_client():
+    """Return the shared Gemini client, creating it on first use.
+
+    Returns None when GEMINI_API_KEY is unset or google-genai is missing.
+    """
+    global _genai_client
+    if _genai_client is None:
+        api_key = os.getenv('GEMINI_API_KEY')
+        if not api_key:
+            logger.warning("GEMINI_API_KEY not set. Analysis will be skipped.")
+            return None
+        try:
+            from google import genai
+        except ImportError:
+            logger.error("google-genai module not found.")
+            return None
+        _genai_client = genai.Client(api_key=api_key)
+    return _genai_client
+
+def analyze_job(job: Job, client, verdict_cache: Optional[Dict[str, dict]] = None) -> Optional[bool]:
+    """Use Gemini to determine if the job matches criteria.
+
+    Verdicts are memoized in verdict_cache, so identical job text is only sent once.
+    Returns None if the job could not be analysed (no client, or the call failed).
+    """
+    cached = cached_verdict(job, verdict_cache)
+    if cached is not None:
+        return cached
 
-def analyze_job(job: Job, client) -> bool:
-    """Use Gemini to determine if the job matches criteria."""
     if not client:
-        return False
+        return None
         
-    prompt = f"""
-    Analyze the following job description to see if it matches these strict criteria:
-    
-    CRITERIA:
-    1. Role Type: Must be a Generalist OR General Annotation/Data Labeling role.
-       - It should be suitable for a recent graduate or undergraduate.
-       - It MUST NOT require specialized advanced degrees (like MD, PhD, JD) unless acceptable for a fresh grad.
-       - It MUST NOT require 5+ years of specialized experience.
-    2. Language: Must be English or Swahili only. No other foreign languages.
-    3. Location: Remote, US-based, or Worldwide.
-    
-    Return ONLY a JSON object: {{"match": boolean, "reason": "short explanation"}}
-    
-    JOB TITLE: {job.title}
-    JOB DESCRIPTION:
-    {job.description[:10000]}  # Truncate to avoid token limits
-    """
+    prompt = f"JOB TITLE: {job.title}\nJOB DESCRIPTION:\n{optimize_description(job.description)}"
     
     try:
         response = client.models.generate_content(
-            model='gemini-2.5-flash',
-            contents=prompt
+            model=GEMINI_MODEL,
+            contents=prompt,
+            config={
+                'system_instruction': JOB_SYSTEM_PROMPT,
+                'response_mime_type': 'application/json',
+                'response_schema': MATCH_SCHEMA,
+            }
         )
-        
-        # Clean response text
-        text = response.text.strip()
-        if text.startswith('```json'):
-            text = text[7:]
-        if text.endswith('```'):
-            text = text[:-3]
-        text = text.strip()
-            
-        result = json.loads(text)
-        
-        if result.get('match'):
-            logger.info(f"MATCH found: {job.title} - {result.get('reason')}")
-            return True
-        else:
-            logger.info(f"No match: {job.title} - {result.get('reason')}")
-            return False
+        if response.parsed is None:
+            raise ValueError(f"unparseable response: {response.text!r}")
+        return record_verdict(job, response.parsed, verdict_cache)
             
     except Exception as e:
         logger.error(f"Gemini analysis failed: {e}")
-        return False
+        return None
+
+def analyze_jobs_batch(jobs: List[Job], client,
+                       verdict_cache: Optional[Dict[str, dict]] = None) -> Dict[str, Optional[bool]]:
+    """Analyze several jobs with a single Gemini call.
+
+    Jobs with a cached verdict are not sent. Jobs missing from a reply that
+    parsed fall back to analyze_job. If the call itself fails (often a rate
+    limit) no per-job calls are made against the same quota. Jobs that
+    could not be analysed are left out of the result; main retries them on
+    the next run.
+    """
+    verdicts = {}
+    pending = []
+    for job in jobs:
+        cached = cached_verdict(job, verdict_cache)
+        if cached is None:
+            pending.append(job)
+        else:
+            verdicts[job.id] = cached
+    if not pending or not client:
+        return verdicts
+
+    prompt = json_dumps([
+        {'id': job.id, 'title': job.title, 'description': optimize_description(job.description)}
+        for job in pending
+    ]).decode()
+
+    try:
+        response = client.models.generate_content(
+            model=GEMINI_MODEL,
+            contents=prompt,
+            config={
+                'system_instruction': BATCH_SYSTEM_PROMPT,
+                'response_mime_type': 'application/json',
+                'response_schema': BATCH_MATCH_SCHEMA,
+            }
+        )
+        if response.parsed is None:
+            raise ValueError(f"unparseable response: {response.text!r}")
+        results = {r['id']: r for r in response.parsed}
+    except Exception as e:
+        logger.error(f"Gemini batch analysis failed: {e}")
+        return verdicts
+
+    for job in pending:
+        if job.id in results:
+            verdicts[job.id] = record_verdict(job, results[job.id], verdict_cache)
+        else:
+            verdict = analyze_job(job, client, verdict_cache)
+            if verdict is not None:
+                verdicts[job.id] = verdict
+    return verdicts
 
 def send_email(matches: List[Job]):
     """Send an email with the list of matching jobs."""
@@ -110,7 +955,7 @@ def send_email(matches: List[Job]):
     sender_password = os.getenv('SMTP_PASSWORD')
     receiver_email = os.getenv('RECEIVER_EMAIL')
     smtp_server = os.getenv('SMTP_SERVER', 'smtp.gmail.com')
-    smtp_port = int(os.getenv('SMTP_PORT', '587'))
+    smtp_port = int(os.getenv('SMTP_PORT', '465'))
     
     if not (sender_email and sender_password and receiver_email):
         logger.warning("SMTP credentials not set. Skipping email.")
@@ -121,16 +966,20 @@ def send_email(matches: List[Job]):
     msg['To'] = receiver_email
     msg['Subject'] = f"New Mercor Job Matches ({len(matches)})"
     
-    body = "<h2>New Job Matches Found</h2><ul>"
+    parts = ["<h2>New Job Matches Found</h2><ul>"]
     for job in matches:
-        body += f"<li><a href='{job.url}'><b>{job.title}</b></a></li>"
-    body += "</ul>"
+        parts.append(f"<li><a href='{html.escape(job.url)}'><b>{html.escape(job.title)}</b></a></li>")
+    parts.append("</ul>")
+    body = "".join(parts)
     
     msg.attach(MIMEText(body, 'html'))
     
     try:
-        with smtplib.SMTP(smtp_server, smtp_port) as server:
-            server.starttls()
+        # Implicit TLS on 465 skips the plaintext greeting + STARTTLS round trip
+        smtp_class = smtplib.SMTP_SSL if smtp_port == 465 else smtplib.SMTP
+        with smtp_class(smtp_server, smtp_port) as server:
+            if smtp_port != 465:
+                server.starttls()
             server.login(sender_email, sender_password)
             server.send_message(msg)
         logger.info(f"Email sent to {receiver_email}")
@@ -140,142 +989,130 @@ def send_email(matches: List[Job]):
 def main():
     logger.info("Starting Mercor Job Bot")
     
-    # Initialize Gemini Client
-    api_key = os.getenv('GEMINI_API_KEY')
-    genai_client = None
-    if api_key:
-        try:
-            from google import genai
-            genai_client = genai.Client(api_key=api_key)
-        except ImportError:
-            logger.error("google-genai module not found.")
-    else:
-        logger.warning("GEMINI_API_KEY not set. Analysis will be skipped.")
+    genai_client = get_genai_client()
 
     history = load_history()
-    jobs = []
+    desc_cache = load_timed_cache(DESC_CACHE_FILE)
+    verdict_cache = load_timed_cache(VERDICT_CACHE_FILE)
+    new_jobs = []
+    
+    # Most job pages server-render their JSON-LD, so detail pages are fetched
+    # over HTTP on worker threads while discovery keeps paginating. One session
+    # is shared so TCP/TLS connections are reused across jobs.
+    session = make_session()
+    executor = ThreadPoolExecutor(max_workers=DETAIL_WORKERS)
+    description_futures = []
+    processed_ids = []
     
+    # The explore page's Next.js data gives the first listings and the buildId
+    # that the JSON data routes for later pages and job details hang off
+    explore_data = None
     try:
-        with sync_playwright() as p:
-            # Launch browser ONCE
-            # Auto-detect CI environment or use HEADLESS env var
-            is_ci = os.getenv('GITHUB_ACTIONS') == 'true'
-            force_headless = os.getenv('HEADLESS', 'false').lower() == 'true'
-            use_headless = is_ci or force_headless
-            
-            logger.info(f"Launching browser (Headless: {use_headless})...")
-            browser = p.chromium.launch(headless=use_headless)
-            context = browser.new_context(viewport={'width': 1366, 'height': 768})
-            page = context.new_page()
-            
+        explore_data = fetch_explore_data(session)
+    except Exception as e:
+        logger.warning(f"Could not load explore page data: {e}")
+    build_id = explore_data['buildId'] if explore_data else None
+    
+    try:
+        with Scraper() as scraper:
             # --- PHASE 1: DISCOVERY ---
-            logger.info(f"Navigating to {MERCOR_URL}...")
-            try:
-                page.goto("https://work.mercor.com/explore", timeout=60000)
-                page.wait_for_load_state("networkidle", timeout=10000)
-            except:
-                pass # Proceed even if network is busy
+            # Dedupe and skip known jobs as listings are found, not after
+            seen_ids = set()
+            refreshed = {}
+            now = time.time()
             
-            # Check for redirect
-            if "/login" in page.url or "auth-wall" in page.url:
-                logger.error("Redirected to login. Cannot scrape.")
-                browser.close()
-                return
-
-            # Wait for job listings
-            logger.info("Scanning for jobs...")
-            try:
-                page.wait_for_selector('a[href*="listingId="]', timeout=30000)
-            except Exception as e:
-                logger.warning(f"Timeout waiting for first job selector: {e}")
-
-            # Pagination
-            max_pages = 5
-            current_page = 1
-            
-            while current_page <= max_pages:
-                content = page.content()
-                soup = BeautifulSoup(content, 'html.parser')
-                
+            for current_page, listings in enumerate(fetch_latest_jobs(scraper, session, explore_data), 1):
                 found_count = 0
-                for link in soup.find_all('a', href=True):
-                    href = link['href']
-                    job_id = None
+                for job_id, title in listings:
+                    if job_id in seen_ids:
+                        continue
+                    seen_ids.add(job_id)
+                    if job_id in history:
+                        # Still listed, so keep it from being pruned (at most once a day)
+                        if now - history[job_id] > 86400:
+                            history[job_id] = refreshed[job_id] = now
+                        continue
                     
-                    if 'listingId=' in href:
-                        match = re.search(r'listingId=(list_[\w-]+)', href)
-                        if match: job_id = match.group(1)
-                    elif 'jobs/list_' in href:
-                        job_id = href.split('list_')[-1]
-                        
-                    if job_id:
-                        job_url = f"https://work.mercor.com/jobs/{job_id}"
-                        # Clean title
-                        title = link.get_text(strip=True)
-                        if "Apply" in title:
-                            title = title.split("Apply")[0].strip()
-                            
-                        if len(title) > 100:
-                            title = title[:100] + "..."
-                        
-                        jobs.append(Job(id=job_id, title=title, url=job_url))
-                        found_count += 1
-                
-                logger.info(f"Page {current_page}: Found {found_count} jobs.")
+                    if len(title) > 100:
+                        title = title[:100] + "..."
+                    
+                    if is_excluded_title(title):
+                        continue
+                    
+                    job = Job(id=job_id, title=title, url=job_url(job_id))
+                    new_jobs.append(job)
+                    description_futures.append(
+                        executor.submit(fetch_description_entry, session, job, desc_cache, build_id)
+                    )
+                    found_count += 1
                 
-                # Check for Next button
-                try:
-                    next_btn = page.locator('button[title="Next"]')
-                    if next_btn.is_visible() and next_btn.is_enabled():
-                        next_btn.click()
-                        page.wait_for_timeout(2000)
-                        current_page += 1
-                    else:
-                        break
-                except:
-                    break
+                logger.info(f"Page {current_page}: Found {found_count} new jobs.")
                     
             # --- PHASE 2: DETAILS & ANALYSIS ---
-            # Deduplicate
-            unique_jobs = {j.id: j for j in jobs}.values()
-            new_jobs = [j for j in unique_jobs if j.id not in history]
+            append_history(refreshed)
             logger.info(f"Found {len(new_jobs)} new jobs to process.")
             
             matches = []
-            processed_ids = []
             
-            for i, job in enumerate(new_jobs):
-                logger.info(f"Processing ({i+1}/{len(new_jobs)}): {job.url}")
+            for job, future in zip(new_jobs, description_futures):
+                apply_description(job, future.result(), desc_cache)
+            save_desc_cache(desc_cache, processed_ids)
+            
+            ready_jobs = [job for job in new_jobs if job.description]
+            # Fall back to rendering the rest in the shared browser
+            fallback_jobs = [job for job in new_jobs if not job.description]
+            if fallback_jobs:
+                logger.info(f"{len(fallback_jobs)} jobs need the browser fallback.")
                 try:
-                    # Navigate to job details using SAME page
-                    page.goto(job.url, timeout=30000)
-                    
-                    # Faster wait strategy
-                    try:
-                        page.wait_for_load_state("domcontentloaded", timeout=10000)
-                    except: pass
-                    
-                    content = page.content()
-                    soup = BeautifulSoup(content, 'html.parser')
-                    job.description = soup.get_text(separator=' ', strip=True)
-                    
-                    # Analyze if client exists
-                    if genai_client:
-                        if analyze_job(job, genai_client):
-                            matches.append(job)
-                    
+                    ready_jobs.extend(get_jobs_details(scraper, fallback_jobs))
+                except Exception as e:
+                    # Still analyse the jobs described over HTTP; the rest are retried next run
+                    logger.error(f"Browser fallback failed: {e}")
+            
+            # Jobs the description already rules out are rejected without a Gemini call
+            now = time.time()
+            candidates = []
+            for job in ready_jobs:
+                if is_disqualified(job):
                     processed_ids.append(job.id)
+                    history[job.id] = now
+                else:
+                    candidates.append(job)
+            append_history({job_id: now for job_id in processed_ids})
+            
+            batches = [
+                candidates[start:start + ANALYSIS_BATCH_SIZE]
+                for start in range(0, len(candidates), ANALYSIS_BATCH_SIZE)
+            ]
+            # Gemini calls are latency bound, so a few batches are in flight at
+            # once; results are still consumed in order as they complete
+            with ThreadPoolExecutor(max_workers=ANALYSIS_WORKERS) as analysis_pool:
+                if genai_client:
+                    results = analysis_pool.map(
+                        lambda batch: analyze_jobs_batch(batch, genai_client, verdict_cache), batches
+                    )
+                else:
+                    results = ({} for _ in batches)
+                
+                for batch, verdicts in zip(batches, results):
+                    matches.extend(job for job in batch if verdicts.get(job.id))
                     
-                    # Save history specifically after each success to prevent data loss
-                    if len(processed_ids) % 5 == 0:
-                        save_history(history + processed_ids)
-                        
-                except Exception as e:
-                    logger.error(f"Failed to process {job.id}: {e}")
+                    # Jobs without a verdict stay out of history (and keep their
+                    # cached description) so the next run retries them
+                    now = time.time()
+                    analysed = [job.id for job in batch if job.id in verdicts]
+                    for job_id in analysed:
+                        processed_ids.append(job_id)
+                        history[job_id] = now
+                    
+                    # Save history after each batch to prevent data loss. Workers
+                    # may still be adding verdicts, so write a snapshot.
+                    append_history({job_id: now for job_id in analysed})
+                    save_json_cache(VERDICT_CACHE_FILE, dict(verdict_cache))
+                    save_desc_cache(desc_cache, processed_ids)
             
-            # Final save
-            save_history(history + processed_ids)
-            browser.close()
+            save_json_cache(VERDICT_CACHE_FILE, verdict_cache)
+            scraper.close()
             
             if matches:
                 send_email(matches)
@@ -284,6 +1121,11 @@ def main():
 
     except Exception as e:
         logger.error(f"Bot crash: {e}")
+    finally:
+        executor.shutdown(cancel_futures=True)
+        session.close()
+        # Also on a crash, so descriptions fetched for unanalysed jobs survive
+        save_desc_cache(desc_cache, processed_ids)
     
     logger.info("Bot execution complete")
 
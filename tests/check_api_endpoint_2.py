@@ -1,4 +1,12 @@
 import requests
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+def probe(session, url):
+    # HEAD is enough to rule out a missing endpoint; only fetch a body worth printing
+    res = session.head(url, timeout=5, allow_redirects=True)
+    if res.status_code in (200, 405):
+        res = session.get(url, timeout=5)
+    return res
 
 def main():
     headers = {
@@ -16,18 +24,21 @@ def main():
         "https://work.mercor.com",
         "https://mercor.com/api"
     ]
+    urls = [f"{base}{endpoint}" for base in bases]
     
-    for base in bases:
-        url = f"{base}{endpoint}"
-        try:
-            print(f"Testing {url}...")
-            res = requests.get(url, headers=headers, timeout=5)
-            print(f"Status: {res.status_code}")
-            if res.status_code == 200:
-                print(f"✅ Found! Snippet: {res.text[:200]}")
-                break
-        except Exception as e:
-            print(f"Error: {e}")
+    # Probe every base at once over one keep-alive session
+    with requests.Session() as session, ThreadPoolExecutor(max_workers=len(urls)) as executor:
+        session.headers.update(headers)
+        futures = {executor.submit(probe, session, url): url for url in urls}
+        for future in as_completed(futures):
+            url = futures[future]
+            try:
+                res = future.result()
+                print(f"{url}: Status {res.status_code}")
+                if res.status_code == 200:
+                    print(f"✅ Found! Snippet: {res.text[:200]}")
+            except Exception as e:
+                print(f"{url}: Error {e}")
 
 if __name__ == "__main__":
     main()
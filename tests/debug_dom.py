@@ -1,18 +1,26 @@
 from playwright.sync_api import sync_playwright
+import sys
+import os
 import time
 
+# Add project root to path
+sys.path.append(os.getcwd())
+
+from src.bot import launch_browser
+
 def debug_dom():
     with sync_playwright() as p:
         print("Launching browser...")
-        browser = p.chromium.launch(headless=False)
+        browser = launch_browser(p)
         page = browser.new_page()
         
         url = "https://work.mercor.com/explore"
         print(f"Navigating to {url}...")
         page.goto(url)
         
-        print("\n⚠️  PLEASE CHECK THE BROWSER WINDOW ⚠️")
-        print("Do you see job listings? (y/n)")
+        if os.getenv('MERCOR_DEBUG') == '1':
+            print("\n⚠️  PLEASE CHECK THE BROWSER WINDOW ⚠️")
+            print("Do you see job listings? (y/n)")
         # Wait for user visual verification could be useful, 
         # but let's just wait a bit and dump.
         time.sleep(10) 
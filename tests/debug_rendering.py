@@ -1,6 +1,13 @@
 from playwright.sync_api import sync_playwright
+import sys
+import os
 import time
 
+# Add project root to path
+sys.path.append(os.getcwd())
+
+from src.bot import block_heavy_requests
+
 def debug_page():
     with sync_playwright() as p:
         browser = p.chromium.launch(headless=True)
@@ -8,6 +15,7 @@ def debug_page():
             user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
             viewport={'width': 1280, 'height': 800}
         )
+        context.route("**/*", block_heavy_requests)
         page = context.new_page()
         
         url = "https://work.mercor.com/explore"
@@ -1,10 +1,19 @@
 from playwright.sync_api import sync_playwright
+import sys
+import os
 import time
 
+# Add project root to path
+sys.path.append(os.getcwd())
+
+from src.bot import block_heavy_requests, launch_browser
+
 def dump_job_html():
     with sync_playwright() as p:
-        browser = p.chromium.launch(headless=False)
-        page = browser.new_page()
+        browser = launch_browser(p)
+        context = browser.new_context()
+        context.route("**/*", block_heavy_requests)
+        page = context.new_page()
         # Using a known job URL from previous logs
         url = "https://work.mercor.com/jobs/list_AAABm4Xm5vZiwyWXybFBRJJN" 
         print(f"Navigating to {url}...")
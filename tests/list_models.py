@@ -1,16 +1,17 @@
+import sys
 import os
-from dotenv import load_dotenv
-from google import genai
 
-load_dotenv()
-api_key = os.getenv('GEMINI_API_KEY')
+# Add project root to path
+sys.path.append(os.getcwd())
 
-if not api_key:
+from src.bot import get_genai_client
+
+client = get_genai_client()
+
+if not client:
     print("API Key not found in .env")
     exit()
 
-client = genai.Client(api_key=api_key)
-
 try:
     print("Listing available models...")
     for model in client.models.list():
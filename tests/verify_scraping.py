@@ -4,24 +4,26 @@ import os
 # Add project root to path
 sys.path.append(os.getcwd())
 
-from src.bot import fetch_latest_jobs, get_job_details
+from src.bot import Job, Scraper, fetch_latest_jobs, get_job_details, job_url, make_session
 
 def test_scraping():
     print("Fetching jobs from mercor.com...")
-    jobs = fetch_latest_jobs()
-    
-    if not jobs:
-        print("❌ No jobs found. Selectors might be broken.")
-        return
-    
-    print(f"✅ Found {len(jobs)} jobs.")
-    
-    # Test details for the first job
-    first_job = jobs[0]
-    print(f"Testing detail fetch for: {first_job.title} ({first_job.url})")
-    
-    full_job = get_job_details(first_job)
-    
+    with Scraper() as scraper, make_session() as session:
+        listings = [listing for page in fetch_latest_jobs(scraper, session) for listing in page]
+
+        if not listings:
+            print("❌ No jobs found. Selectors might be broken.")
+            return
+
+        print(f"✅ Found {len(listings)} jobs.")
+
+        # Test details for the first job
+        job_id, title = listings[0]
+        first_job = Job(id=job_id, title=title, url=job_url(job_id))
+        print(f"Testing detail fetch for: {first_job.title} ({first_job.url})")
+
+        full_job = get_job_details(scraper, first_job)
+
     if full_job.description:
         print(f"✅ Successfully fetched description ({len(full_job.description)} chars).")
         print("Snippet:", full_job.description[:200])